@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+
+
+class TokenBucket:
+    '''Refills ``rate`` tokens per second up to ``burst``.'''
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        '''Take one token. Return 0 on success, else seconds until one is available.'''
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class Gate:
+    '''Concurrency limit for one route with a bounded wait queue.'''
+
+    def __init__(self, limit, queue_size):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout):
+        '''Return True once admitted, False if the queue is full or the wait times out.'''
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue_size:
+                return False
+
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self.active < self.limit, timeout)
+            finally:
+                self.waiting -= 1
+            if admitted:
+                self.active += 1
+            return admitted
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class AdmissionController:
+    '''Sheds load on write routes before it reaches the database.
+
+    Only endpoints named in ``ADMISSION_CONCURRENCY`` are controlled, so reads
+    are never queued. Each controlled request must first take a token from its
+    client's bucket (429 otherwise), then get a slot on the route's gate
+    within ``ADMISSION_QUEUE_TARGET`` seconds (503 otherwise).
+    '''
+
+    def __init__(self, app=None):
+        self.gates = {}
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ADMISSION_CONCURRENCY', {})
+        app.config.setdefault('ADMISSION_QUEUE_SIZE', 16)
+        app.config.setdefault('ADMISSION_QUEUE_TARGET', 0.25)
+        app.config.setdefault('ADMISSION_RATE', 0)
+        app.config.setdefault('ADMISSION_BURST', 10)
+        app.config.setdefault('ADMISSION_MAX_CLIENTS', 10000)
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def reset(self):
+        '''Drop gates and buckets so config changes take effect.'''
+        with self._lock:
+            self.gates.clear()
+            self.buckets.clear()
+
+    def _gate(self, endpoint, config):
+        with self._lock:
+            gate = self.gates.get(endpoint)
+            if gate is None:
+                gate = Gate(
+                    config['ADMISSION_CONCURRENCY'][endpoint],
+                    config['ADMISSION_QUEUE_SIZE'])
+                self.gates[endpoint] = gate
+            return gate
+
+    def _take_token(self, config):
+        rate = config['ADMISSION_RATE']
+        if not rate:
+            return 0
+        client = request.remote_addr
+        with self._lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                bucket = TokenBucket(rate, config['ADMISSION_BURST'])
+                self.buckets[client] = bucket
+                if len(self.buckets) > config['ADMISSION_MAX_CLIENTS']:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(client)
+            return bucket.take()
+
+    def _before_request(self):
+        config = current_app.config
+        endpoint = request.endpoint
+        if endpoint not in config['ADMISSION_CONCURRENCY']:
+            return None
+
+        wait = self._take_token(config)
+        if wait:
+            return reject(429, 'Too many requests', wait)
+
+        gate = self._gate(endpoint, config)
+        target = config['ADMISSION_QUEUE_TARGET']
+        if not gate.acquire(target):
+            return reject(503, 'Server busy, try again later', target)
+
+        g.admission_gate = gate
+        return None
+
+    def _teardown_request(self, exc):
+        gate = g.pop('admission_gate', None)
+        if gate is not None:
+            gate.release()
+
+
+def reject(status, message, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
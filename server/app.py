@@ -1,7 +1,16 @@
+from admission import AdmissionController
+from assignment import assign_signups
+from export import (STREAM_WRITERS, export_query_schema, export_signups_command,
+                    prefetch, signup_export_rows)
 from models import db, Activity, Camper, Signup
+from profiling import Profiler
+from sqlalchemy.exc import SQLAlchemyError
+from schemas import (assignment_schema, camper_create_schema, camper_update_schema,
+                     preference_schema, signup_create_schema)
 from flask_restful import Api, Resource
 from flask_migrate import Migrate
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
+import json
 import os
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -10,10 +19,29 @@ DATABASE = os.environ.get("DB_URI", f"sqlite:///{os.path.join(BASE_DIR, 'app.db'
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['ADMISSION_CONCURRENCY'] = {
+    'create_camper': int(os.environ.get('ADMISSION_WRITE_CONCURRENCY', 4)),
+    'create_signup': int(os.environ.get('ADMISSION_WRITE_CONCURRENCY', 4)),
+    'create_assignments': 1,
+    'export_signups': int(os.environ.get('ADMISSION_EXPORT_CONCURRENCY', 1)),
+}
+app.config['ADMISSION_RATE'] = float(os.environ.get('ADMISSION_RATE', 0))
+app.config['ADMISSION_BURST'] = int(os.environ.get('ADMISSION_BURST', 10))
+app.config['ASSIGNMENT_CAPACITY'] = int(os.environ.get('ASSIGNMENT_CAPACITY', 20))
+app.config['ASSIGNMENT_MIN_AGE_BY_DIFFICULTY'] = {
+    int(difficulty): int(age) for difficulty, age in json.loads(
+        os.environ.get('ASSIGNMENT_MIN_AGE_BY_DIFFICULTY', '{}')).items()
+}
+app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
 app.json.compact = False
 
 migrate = Migrate(app, db)
 db.init_app(app)
+profiler = Profiler(app)
+admission = AdmissionController(app)
+app.cli.add_command(export_signups_command)
 
 
 @app.route('/')
@@ -30,28 +58,28 @@ def get_campers():
 
 @app.route('/campers', methods=['POST'])
 def create_camper():
-    request_data = request.get_json() or {}
-    name = request_data.get('name', '')
-    age = request_data.get('age')
+    request_data = request.get_json(silent=True)
 
-    if not age.isdigit():
-        validation_errors = ['Age must be an integer']
-        response_data = {'errors': validation_errors}
-        return jsonify(response_data), 400
+    if isinstance(request_data, list):
+        if not request_data:
+            return validation_error({'_schema': ['Expected a non-empty array']})
+        rows, errors = camper_create_schema.validate_many(request_data)
+        if errors:
+            return validation_error(errors)
 
-    camper = Camper(name=name, age=int(age))
-
-    validation_errors = []
-    try:
-        db.session.add(camper)
+        campers = [Camper(**row) for row in rows]
+        db.session.add_all(campers)
         db.session.commit()
-    except ValueError as e:
-        db.session.rollback()
-        validation_errors = [str(error) for error in e.args]
 
-    if validation_errors:
-        response_data = {'errors': validation_errors}
-        return jsonify(response_data), 400
+        return jsonify([serialize_camper(camper) for camper in campers]), 201
+
+    data, errors = camper_create_schema.validate(request_data or {})
+    if errors:
+        return validation_error(errors)
+
+    camper = Camper(**data)
+    db.session.add(camper)
+    db.session.commit()
 
     response_data = {
         'id': camper.id,
@@ -76,37 +104,19 @@ def get_camper(id):
 
 @app.route('/campers/<int:id>', methods=['PATCH'])
 def update_camper(id):
+    data, errors = camper_update_schema.validate(request.get_json(silent=True) or {})
+    if errors:
+        return validation_error(errors)
+
     camper = Camper.query.get(id)
 
     if not camper:
         error_response = {'error': 'Camper not found'}
         return jsonify(error_response), 404
 
-    request_data = request.get_json()
-    name = request_data.get('name')
-    age = request_data.get('age')
-
-    if name:
-        camper.name = name
-    if age:
-        try:
-            camper.age = int(age)  # Convert age to an integer
-        except ValueError:
-            error_response = {
-                'error': 'Invalid age value. Age must be a valid integer.'
-            }
-            return jsonify(error_response), 400
-
-    validation_errors = []
-    try:
-        db.session.commit()
-    except ValueError as e:
-        db.session.rollback()
-        validation_errors = [str(error) for error in e.args]
-
-    if validation_errors:
-        response_data = {'errors': validation_errors}
-        return jsonify(response_data), 400
+    for key, value in data.items():
+        setattr(camper, key, value)
+    db.session.commit()
 
     response_data = {
         'id': camper.id,
@@ -144,39 +154,197 @@ def delete_activity(id):
 
 @app.route('/signups', methods=['POST'])
 def create_signup():
-    request_data = request.get_json()
-    camper_id = request_data.get('camper_id')
-    activity_id = request_data.get('activity_id')
-    time = request_data.get('time')
+    request_data = request.get_json(silent=True)
+
+    if isinstance(request_data, list):
+        if not request_data:
+            return validation_error({'_schema': ['Expected a non-empty array']})
+        rows, errors = signup_create_schema.validate_many(request_data)
+        if errors:
+            return validation_error(errors)
+        return create_signups(rows)
 
-    camper = Camper.query.get(camper_id)
-    activity = Activity.query.get(activity_id)
+    data, errors = signup_create_schema.validate(request_data or {})
+    if errors:
+        return validation_error(errors)
+
+    camper = Camper.query.get(data['camper_id'])
+    activity = Activity.query.get(data['activity_id'])
 
     if not camper or not activity:
         error_response = {'error': 'Camper or Activity not found'}
         return jsonify(error_response), 400
 
-    if not isinstance(time, int) or time < 0 or time > 23:
+    signup = Signup(**data)
+    db.session.add(signup)
+    db.session.commit()
+
+    return jsonify(serialize_created_signup(signup, camper, activity)), 201
+
+
+def create_signups(rows):
+    camper_ids = {row['camper_id'] for row in rows}
+    activity_ids = {row['activity_id'] for row in rows}
+    campers = {
+        camper.id: camper
+        for camper in Camper.query.filter(Camper.id.in_(camper_ids))
+    }
+    activities = {
+        activity.id: activity
+        for activity in Activity.query.filter(Activity.id.in_(activity_ids))
+    }
+
+    missing = [
+        index for index, row in enumerate(rows)
+        if row['camper_id'] not in campers or row['activity_id'] not in activities
+    ]
+    if missing:
+        error_response = {'error': 'Camper or Activity not found', 'indexes': missing}
+        return jsonify(error_response), 400
+
+    signups = [Signup(**row) for row in rows]
+    db.session.add_all(signups)
+    db.session.commit()
+
+    response_data = [
+        serialize_created_signup(
+            signup, campers[signup.camper_id], activities[signup.activity_id])
+        for signup in signups
+    ]
+    return jsonify(response_data), 201
+
+
+@app.route('/assignments', methods=['POST'])
+def create_assignments():
+    data, errors = assignment_schema.validate(request.get_json(silent=True) or {})
+    if errors:
+        return validation_error(errors)
+
+    preferences, errors = preference_schema.validate_many(data['preferences'])
+    if errors:
+        return validation_error({'preferences': errors})
+
+    camper_ids = [preference['camper_id'] for preference in preferences]
+    if len(set(camper_ids)) != len(camper_ids):
+        return validation_error({'preferences': ['Each camper may appear only once']})
+
+    activity_ids = {a for preference in preferences for a in preference['activities']}
+    campers = {
+        camper.id: camper
+        for camper in Camper.query.filter(Camper.id.in_(camper_ids))
+    }
+    activities = {
+        activity.id: activity
+        for activity in Activity.query.filter(Activity.id.in_(activity_ids))
+    }
+
+    missing = [
+        index for index, preference in enumerate(preferences)
+        if preference['camper_id'] not in campers
+        or any(a not in activities for a in preference['activities'])
+    ]
+    if missing:
+        error_response = {'error': 'Camper or Activity not found', 'indexes': missing}
+        return jsonify(error_response), 400
+
+    signups, unplaced = assign_signups(
+        campers, activities, preferences,
+        capacity=data.get('capacity', app.config['ASSIGNMENT_CAPACITY']),
+        hours=data.get('hours'),
+        max_per_camper=data.get('max_per_camper'),
+        min_age_by_difficulty=app.config['ASSIGNMENT_MIN_AGE_BY_DIFFICULTY']
+    )
+
+    response_data = {
+        'assigned': len(signups),
+        'signups': signups,
+        'unplaced': unplaced
+    }
+    return jsonify(response_data), 201
+
+
+@app.route('/export/signups', methods=['GET'])
+def export_signups():
+    if not profiler.is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in STREAM_WRITERS:
         error_response = {
-            'error': 'Invalid time value. Time must be between 0 and 23.'
+            'error': f"Unsupported format. Use one of: {', '.join(STREAM_WRITERS)}"
         }
         return jsonify(error_response), 400
 
-    signup = Signup(camper_id=camper_id, activity_id=activity_id, time=time)
+    data, errors = export_query_schema.validate(request.args.to_dict())
+    if errors:
+        return validation_error(errors)
 
-    validation_errors = []
+    iter_rows, mimetype = STREAM_WRITERS[fmt]
+    batch_size = app.config['EXPORT_BATCH_SIZE']
+    rows = signup_export_rows(data.get('min_id'), data.get('max_id'), batch_size)
     try:
-        db.session.add(signup)
-        db.session.commit()
-    except ValueError as e:
+        rows = prefetch(rows)
+    except SQLAlchemyError:
         db.session.rollback()
-        validation_errors = [str(error) for error in e.args]
+        return jsonify({'error': 'Export query failed'}), 500
+
+    return Response(
+        stream_with_context(iter_rows(rows, batch_size)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=signups.{fmt}'}
+    )
+
+
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    if not profiler.is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
 
-    if validation_errors:
-        response_data = {'errors': validation_errors}
-        return jsonify(response_data), 400
+    return jsonify(profiles=profiler.list_captures())
 
+
+@app.route('/admin/profiles/<int:id>', methods=['GET'])
+def get_profile(id):
+    if not profiler.is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    capture = profiler.get_capture(id)
+    if not capture:
+        error_response = {'error': 'Profile not found'}
+        return jsonify(error_response), 404
+
+    if request.args.get('format') == 'collapsed':
+        return Response(
+            capture['collapsed'],
+            mimetype='text/plain',
+            headers={
+                'Content-Disposition': f'attachment; filename=profile-{id}.folded'
+            }
+        )
+
+    response_data = {
+        'id': capture['id'],
+        'method': capture['method'],
+        'path': capture['path'],
+        'status': capture['status'],
+        'timestamp': capture['timestamp'],
+        'duration_ms': capture['duration_ms'],
+        'sql': capture['sql'],
+        'collapsed': capture['collapsed']
+    }
+    return jsonify(profile=response_data)
+
+
+def validation_error(field_errors):
     response_data = {
+        'errors': ['validation errors'],
+        'field_errors': field_errors
+    }
+    return jsonify(response_data), 400
+
+
+def serialize_created_signup(signup, camper, activity):
+    return {
         'id': signup.id,
         'camper_id': camper.id,
         'activity_id': activity.id,
@@ -185,8 +353,6 @@ def create_signup():
         'camper': serialize_camper(camper)
     }
 
-    return jsonify(response_data), 201
-
 
 def serialize_camper(camper):
     return {
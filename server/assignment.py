@@ -0,0 +1,198 @@
+import numpy as np
+from sqlalchemy import text
+
+from models import db, Activity, Camper, Signup
+
+HOURS = 24
+
+
+def minimum_ages(difficulties, min_age_by_difficulty):
+    '''Youngest camper age allowed for each activity, from its difficulty.
+
+    ``min_age_by_difficulty`` maps a difficulty to the minimum age for it
+    (the ASSIGNMENT_MIN_AGE_BY_DIFFICULTY setting). Difficulties it does not
+    list, including activities without one, have no age restriction.
+    '''
+    return np.array(
+        [min_age_by_difficulty.get(difficulty, 0) for difficulty in difficulties],
+        dtype=int)
+
+
+def lock_signups(camper_ids, activity_ids):
+    '''Take a write lock so occupancy cannot change until the commit.
+
+    SQLite locks the whole database with BEGIN IMMEDIATE; other databases
+    lock the camper and activity rows being assigned, which serializes
+    concurrent assignment runs that touch them.
+    '''
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('BEGIN IMMEDIATE'))
+        return
+    db.session.query(Activity.id).filter(
+        Activity.id.in_(activity_ids)).with_for_update().all()
+    db.session.query(Camper.id).filter(
+        Camper.id.in_(camper_ids)).with_for_update().all()
+
+
+def assign(ages, min_ages, preferences, camper_busy, occupancy, capacity,
+           hours=None, max_per_camper=None, already=None):
+    '''Greedily place campers into their ranked activities.
+
+    ``ages`` holds each camper's age and ``min_ages`` each activity's minimum
+    age. ``preferences`` is a (campers, ranks) array of activity indexes padded
+    with -1. ``camper_busy`` (campers x 24, bool) and ``occupancy``
+    (activities x 24, int) hold existing signups and are updated in place.
+    ``already`` (campers x activities, bool) marks activities a camper is
+    signed up for; those preferences count as placed and are skipped.
+
+    Without ``max_per_camper`` each camper gets at most one new signup per
+    rank. With it, the camper's existing signups in ``hours`` count against
+    the cap along with the new ones.
+
+    Ranks are filled one at a time across all campers, so everyone gets a
+    first choice before anyone gets a third. Within a rank each camper takes
+    the earliest hour where they are free and the activity has room; when
+    more campers want an activity-hour than it can hold, earlier campers win
+    and the rest retry at their next free hour.
+
+    Returns (camper, activity, hour) index arrays for the new signups and a
+    (campers, ranks) bool array of the preferences that were placed.
+    '''
+    n_campers, n_ranks = preferences.shape
+    allowed = np.zeros(HOURS, dtype=bool)
+    allowed[list(range(HOURS)) if hours is None else hours] = True
+    limit = n_ranks if max_per_camper is None else max_per_camper
+
+    eligible = ages[:, None] >= min_ages[None, :]
+    if max_per_camper is None:
+        counts = np.zeros(n_campers, dtype=int)
+    else:
+        counts = camper_busy[:, allowed].sum(axis=1)
+    placed = np.zeros(preferences.shape, dtype=bool)
+    if already is not None:
+        rows, ranks = np.nonzero(preferences >= 0)
+        placed[rows, ranks] = already[rows, preferences[rows, ranks]]
+    flat_occupancy = occupancy.reshape(-1)
+
+    new_campers, new_activities, new_hours = [], [], []
+
+    for rank in range(n_ranks):
+        choice = preferences[:, rank]
+        pending = np.flatnonzero((choice >= 0) & ~placed[:, rank])
+        pending = pending[
+            eligible[pending, choice[pending]] & (counts[pending] < limit)]
+
+        while pending.size:
+            activities = choice[pending]
+            feasible = (
+                ~camper_busy[pending]
+                & (occupancy[activities] < capacity)
+                & allowed
+            )
+            has_room = feasible.any(axis=1)
+            pending = pending[has_room]
+            if not pending.size:
+                break
+            activities = activities[has_room]
+            hour = feasible[has_room].argmax(axis=1)
+
+            cell = activities * HOURS + hour
+            order = np.argsort(cell, kind='stable')
+            sorted_cell = cell[order]
+            index = np.arange(sorted_cell.size)
+            group_start = np.ones(sorted_cell.size, dtype=bool)
+            group_start[1:] = sorted_cell[1:] != sorted_cell[:-1]
+            position = index - np.maximum.accumulate(np.where(group_start, index, 0))
+            fits = np.zeros(sorted_cell.size, dtype=bool)
+            fits[order] = position < capacity - flat_occupancy[sorted_cell]
+
+            campers, activities, hour = pending[fits], activities[fits], hour[fits]
+            camper_busy[campers, hour] = True
+            np.add.at(occupancy, (activities, hour), 1)
+            counts[campers] += 1
+            placed[campers, rank] = True
+            new_campers.append(campers)
+            new_activities.append(activities)
+            new_hours.append(hour)
+
+            pending = pending[~fits]
+
+    if not new_campers:
+        empty = np.zeros(0, dtype=int)
+        return (empty, empty, empty), placed
+    return (
+        np.concatenate(new_campers),
+        np.concatenate(new_activities),
+        np.concatenate(new_hours),
+    ), placed
+
+
+def assign_signups(campers, activities, preferences, capacity, hours=None,
+                   max_per_camper=None, min_age_by_difficulty=None):
+    '''Build occupancy matrices from the database, assign, and bulk-write signups.
+
+    ``campers`` and ``activities`` map ids to loaded rows; ``preferences`` is
+    a list of {camper_id, activities} dicts in priority order. Existing
+    signups are read under a write lock and the new ones are inserted in the
+    same transaction, so concurrent runs cannot overbook. Activities a camper
+    is already signed up for are not booked again, so repeating a run adds
+    nothing. Returns the new signups and the preferences that could not be
+    placed.
+    '''
+    camper_ids = [preference['camper_id'] for preference in preferences]
+    activity_ids = list(activities)
+    camper_index = {camper_id: i for i, camper_id in enumerate(camper_ids)}
+    activity_index = {activity_id: i for i, activity_id in enumerate(activity_ids)}
+
+    ages = np.array(
+        [campers[camper_id].age or 0 for camper_id in camper_ids], dtype=int)
+    min_ages = minimum_ages(
+        [activities[activity_id].difficulty for activity_id in activity_ids],
+        min_age_by_difficulty or {})
+
+    n_ranks = max(len(preference['activities']) for preference in preferences)
+    ranked = np.full((len(camper_ids), n_ranks), -1, dtype=int)
+    for row, preference in enumerate(preferences):
+        choices = list(dict.fromkeys(preference['activities']))
+        ranked[row, :len(choices)] = [activity_index[a] for a in choices]
+
+    lock_signups(camper_ids, activity_ids)
+    camper_busy = np.zeros((len(camper_ids), HOURS), dtype=bool)
+    occupancy = np.zeros((len(activity_ids), HOURS), dtype=int)
+    already = np.zeros((len(camper_ids), len(activity_ids)), dtype=bool)
+    existing = db.session.query(Signup.camper_id, Signup.activity_id, Signup.time).filter(
+        Signup.camper_id.in_(camper_ids) | Signup.activity_id.in_(activity_ids),
+    )
+    for camper_id, activity_id, time in existing:
+        camper = camper_index.get(camper_id)
+        activity = activity_index.get(activity_id)
+        if camper is not None and activity is not None:
+            already[camper, activity] = True
+        if time is None:
+            continue
+        if camper is not None:
+            camper_busy[camper, time] = True
+        if activity is not None:
+            occupancy[activity, time] += 1
+
+    (camper_rows, activity_rows, hour_rows), placed = assign(
+        ages, min_ages, ranked, camper_busy, occupancy, capacity,
+        hours, max_per_camper, already)
+
+    signups = [
+        {
+            'camper_id': camper_ids[c],
+            'activity_id': activity_ids[a],
+            'time': hour,
+        }
+        for c, a, hour in zip(
+            camper_rows.tolist(), activity_rows.tolist(), hour_rows.tolist())
+    ]
+    db.session.bulk_insert_mappings(Signup, signups)
+    db.session.commit()
+
+    unplaced = [
+        {'camper_id': camper_ids[c], 'activity_id': activity_ids[ranked[c, r]]}
+        for c, r in zip(*(axis.tolist() for axis in np.nonzero((ranked >= 0) & ~placed)))
+    ]
+    return signups, unplaced
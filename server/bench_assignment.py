@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+'''Assignment engine time at increasing camper counts.
+
+    python bench_assignment.py [--sizes 500 2000 8000 32000] [--ranks 5]
+
+Times the NumPy engine alone and the full run (load, assign, bulk write)
+against a throwaway SQLite database unless DB_URI is set.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+from random import randint, sample
+
+if 'DB_URI' not in os.environ:
+    os.environ['DB_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'assign.db')}"
+
+import numpy as np
+
+from app import app
+from assignment import HOURS, assign, assign_signups, minimum_ages
+from models import db, Activity, Camper, Signup
+
+HOURS_OPEN = list(range(9, 17))
+
+
+def seed(n_campers, n_activities):
+    Signup.query.delete()
+    Camper.query.delete()
+    Activity.query.delete()
+    db.session.commit()
+    db.session.bulk_insert_mappings(Camper, [
+        {'name': f'Camper {i}', 'age': randint(8, 18)} for i in range(n_campers)
+    ])
+    db.session.bulk_insert_mappings(Activity, [
+        {'name': f'Activity {i}', 'difficulty': randint(1, 5)} for i in range(n_activities)
+    ])
+    db.session.commit()
+    return Camper.query.all(), Activity.query.all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 8000, 32000])
+    parser.add_argument('--ranks', type=int, default=5)
+    parser.add_argument('--capacity', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        for n_campers in args.sizes:
+            n_activities = max(args.ranks, n_campers // 20)
+            campers, activities = seed(n_campers, n_activities)
+            activity_ids = [activity.id for activity in activities]
+            preferences = [
+                {'camper_id': camper.id, 'activities': sample(activity_ids, args.ranks)}
+                for camper in campers
+            ]
+
+            index = {activity_id: i for i, activity_id in enumerate(activity_ids)}
+            ranked = np.array([[index[a] for a in p['activities']] for p in preferences])
+            ages = np.array([camper.age for camper in campers])
+            min_ages = minimum_ages(
+                [activity.difficulty for activity in activities],
+                app.config['ASSIGNMENT_MIN_AGE_BY_DIFFICULTY'])
+            start = time.perf_counter()
+            (placed_campers, _, _), _ = assign(
+                ages, min_ages, ranked,
+                np.zeros((n_campers, HOURS), dtype=bool),
+                np.zeros((n_activities, HOURS), dtype=int),
+                args.capacity, HOURS_OPEN)
+            engine = time.perf_counter() - start
+
+            start = time.perf_counter()
+            signups, unplaced = assign_signups(
+                {camper.id: camper for camper in campers},
+                {activity.id: activity for activity in activities},
+                preferences, args.capacity, HOURS_OPEN,
+                min_age_by_difficulty=app.config['ASSIGNMENT_MIN_AGE_BY_DIFFICULTY'])
+            total = time.perf_counter() - start
+
+            print(f'{n_campers:>7} campers {n_activities:>5} activities  '
+                  f'engine {engine * 1000:8.1f}ms  end-to-end {total * 1000:8.1f}ms  '
+                  f'{len(signups):>7} signups  {len(unplaced):>6} unplaced')
+
+
+if __name__ == '__main__':
+    main()
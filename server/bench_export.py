@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+'''Rows/sec and peak memory of the streaming signup export.
+
+    python bench_export.py [--signups 10000000] [--format csv]
+
+Runs against a throwaway SQLite database unless DB_URI is set.
+'''
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from random import randint
+
+if 'DB_URI' not in os.environ:
+    os.environ['DB_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'export.db')}"
+
+from app import app
+from export import STREAM_WRITERS, signup_export_rows
+from models import db, Activity, Camper, Signup
+
+CHUNK = 50000
+
+
+def seed(signups, campers=2000, activities=20):
+    db.create_all()
+    db.session.execute(Camper.__table__.insert(), [
+        {'name': f'Camper {i}', 'age': randint(8, 18)} for i in range(campers)
+    ])
+    db.session.execute(Activity.__table__.insert(), [
+        {'name': f'Activity {i}', 'difficulty': randint(1, 5)} for i in range(activities)
+    ])
+    for start in range(0, signups, CHUNK):
+        db.session.execute(Signup.__table__.insert(), [
+            {
+                'camper_id': randint(1, campers),
+                'activity_id': randint(1, activities),
+                'time': randint(0, 23),
+            }
+            for _ in range(min(CHUNK, signups - start))
+        ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signups', type=int, default=1000000)
+    parser.add_argument('--format', choices=tuple(STREAM_WRITERS), default='csv')
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        seed(args.signups)
+        print(f'seeded {args.signups} signups in {time.perf_counter() - start:.1f}s')
+
+        batch_size = app.config['EXPORT_BATCH_SIZE']
+        iter_rows = STREAM_WRITERS[args.format][0]
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        size = 0
+        for chunk in iter_rows(signup_export_rows(batch_size=batch_size), batch_size):
+            size += len(chunk)
+        elapsed = time.perf_counter() - start
+
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f'{args.format}: {args.signups / elapsed:,.0f} rows/s, '
+              f'{size / 1e6:,.0f}MB in {elapsed:.1f}s, '
+              f'peak RSS {rss_before // 1024}MB -> {rss_after // 1024}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+'''Per-item cost of the compiled request schemas.
+
+    python bench_validation.py [--items 100000]
+'''
+
+import argparse
+import time
+from random import randint
+
+from schemas import camper_create_schema, signup_create_schema
+
+
+def bench(name, func, items):
+    start = time.perf_counter()
+    func(items)
+    elapsed = time.perf_counter() - start
+    per_item = elapsed / len(items) * 1e6
+    print(f'{name:<28} {len(items):>8} items  {elapsed * 1000:8.1f}ms  {per_item:6.2f}us/item')
+
+
+def validate_each(schema):
+    def run(items):
+        validate = schema.validate
+        for item in items:
+            validate(item)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+
+    campers = [{'name': f'Camper {i}', 'age': randint(8, 18)} for i in range(args.items)]
+    bad_campers = [{'name': '', 'age': 'x'} for _ in range(args.items)]
+    signups = [
+        {'camper_id': str(i), 'activity_id': i, 'time': randint(0, 23)}
+        for i in range(1, args.items + 1)
+    ]
+
+    bench('camper, one at a time', validate_each(camper_create_schema), campers)
+    bench('camper, array', camper_create_schema.validate_many, campers)
+    bench('invalid camper, array', camper_create_schema.validate_many, bad_campers)
+    bench('signup, one at a time', validate_each(signup_create_schema), signups)
+    bench('signup, array', signup_create_schema.validate_many, signups)
+
+
+if __name__ == '__main__':
+    main()
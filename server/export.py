@@ -0,0 +1,161 @@
+import csv
+import io
+import itertools
+import json
+import sys
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from models import db, Activity, Camper, Signup
+from schemas import MAX_ID, Field, Schema
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_COLUMNS = (
+    'signup_id', 'time',
+    'camper_id', 'camper_name', 'camper_age',
+    'activity_id', 'activity_name', 'activity_difficulty',
+)
+
+export_query_schema = Schema(
+    min_id=Field(int, 'min_id must be an integer between 0 and 2**63-1',
+                 minimum=0, maximum=MAX_ID),
+    max_id=Field(int, 'max_id must be an integer between 0 and 2**63-1',
+                 minimum=0, maximum=MAX_ID),
+)
+
+
+def signup_export_rows(min_id=None, max_id=None, batch_size=1000):
+    '''Yield one tuple per signup, joined with its camper and activity.
+
+    Runs a single query over a server-side cursor, fetching ``batch_size``
+    rows at a time, so memory stays flat however many signups there are.
+    '''
+    query = (
+        db.session.query(
+            Signup.id, Signup.time,
+            Camper.id, Camper.name, Camper.age,
+            Activity.id, Activity.name, Activity.difficulty,
+        )
+        .join(Camper, Signup.camper_id == Camper.id)
+        .join(Activity, Signup.activity_id == Activity.id)
+    )
+
+    if min_id is not None:
+        query = query.filter(Signup.id >= min_id)
+    if max_id is not None:
+        query = query.filter(Signup.id <= max_id)
+
+    for row in query.order_by(Signup.id).yield_per(batch_size):
+        yield tuple(row)
+
+
+def prefetch(rows):
+    '''Run the query and fetch its first batch now, not when streaming starts.
+
+    Errors from the database then surface before any response headers are
+    sent instead of truncating a 200 download.
+    '''
+    first = next(rows, None)
+    if first is None:
+        return iter(())
+    return itertools.chain((first,), rows)
+
+
+def iter_csv(rows, batch_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows, batch_size=1000):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, row))))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+STREAM_WRITERS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+def write_parquet(rows, path, batch_size=100000):
+    '''Write rows to a Parquet file one row group per batch.'''
+    if pyarrow is None:
+        raise RuntimeError('Parquet export requires pyarrow')
+
+    schema = pyarrow.schema([
+        ('signup_id', pyarrow.int64()), ('time', pyarrow.int32()),
+        ('camper_id', pyarrow.int64()), ('camper_name', pyarrow.string()),
+        ('camper_age', pyarrow.int32()),
+        ('activity_id', pyarrow.int64()), ('activity_name', pyarrow.string()),
+        ('activity_difficulty', pyarrow.int32()),
+    ])
+
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_table(_parquet_table(batch, schema))
+                batch = []
+        if batch:
+            writer.write_table(_parquet_table(batch, schema))
+
+
+def _parquet_table(batch, schema):
+    columns = list(zip(*batch))
+    return pyarrow.Table.from_arrays(
+        [pyarrow.array(column, type=field.type)
+         for column, field in zip(columns, schema)],
+        schema=schema)
+
+
+@click.command('export-signups')
+@click.option('--format', 'fmt', type=click.Choice(tuple(STREAM_WRITERS) + ('parquet',)),
+              default='csv', show_default=True)
+@click.option('--min-id', type=click.IntRange(0, MAX_ID), help='Lowest signup id to export.')
+@click.option('--max-id', type=click.IntRange(0, MAX_ID), help='Highest signup id to export.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False),
+              help='Output file (defaults to stdout; required for parquet).')
+@with_appcontext
+def export_signups_command(fmt, min_id, max_id, output):
+    '''Export every signup joined with its camper and activity.'''
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    rows = signup_export_rows(min_id, max_id, batch_size)
+
+    if fmt == 'parquet':
+        if not output:
+            raise click.UsageError('--output is required for parquet')
+        if pyarrow is None:
+            raise click.ClickException('Parquet export requires pyarrow')
+        write_parquet(rows, output)
+        return
+
+    iter_rows = STREAM_WRITERS[fmt][0]
+    out = open(output, 'w', newline='') if output else sys.stdout
+    try:
+        for chunk in iter_rows(rows, batch_size):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
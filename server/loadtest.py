@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+'''Read latency under a write burst, with and without admission control.
+
+    python loadtest.py [--seconds 10] [--workers 4] [--readers 4]
+                       [--writers 4] [--write-rate 25]
+
+Starts the app as a pre-fork HTTP server (``--workers`` processes, each
+threaded, sharing one listening socket) and drives it over HTTP from
+separate client processes. Readers send GET /activities back to back
+(writers never grow that table, so read cost is the same in every phase);
+writers send POST /campers and POST /signups on a fixed schedule, one thread per
+request (open loop, up to ``--max-in-flight`` outstanding per writer), so
+every phase offers the same write load whether or not requests are shed.
+Admission state is per worker process, as it would be under gunicorn; all
+load comes from 127.0.0.1, so the token bucket acts as one client.
+
+Runs against a throwaway SQLite database unless DB_URI is set.
+'''
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from random import randint
+
+if 'DB_URI' not in os.environ:
+    os.environ['DB_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+
+from faker import Faker
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import app
+from models import db, Activity, Camper
+
+fake = Faker()
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def serve(fd, port, admission):
+    app.config.update(admission)
+    app.logger.disabled = True
+    with app.app_context():
+        db.engine.dispose()
+    server = make_server(
+        '127.0.0.1', port, app, threaded=True,
+        request_handler=QuietHandler, fd=fd)
+    server.serve_forever()
+
+
+def start_server(workers, admission):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(128)
+    port = sock.getsockname()[1]
+    processes = [
+        multiprocessing.Process(
+            target=serve, args=(sock.fileno(), port, admission), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    sock.close()
+    return port, processes
+
+
+def request(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        connection.request(
+            method, path, body=json.dumps(body) if body is not None else None,
+            headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def reader(port, deadline, results):
+    latencies = []
+    errors = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        if request(port, 'GET', '/activities') != 200:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    results.put(('read', latencies, errors))
+
+
+def send_write(port, camper_ids, activity_ids, statuses, lock, in_flight):
+    try:
+        if randint(0, 1):
+            body = {'name': fake.name(), 'age': randint(8, 18)}
+            status = request(port, 'POST', '/campers', body)
+        else:
+            body = {
+                'camper_id': camper_ids[randint(0, len(camper_ids) - 1)],
+                'activity_id': activity_ids[randint(0, len(activity_ids) - 1)],
+                'time': randint(0, 23),
+            }
+            status = request(port, 'POST', '/signups', body)
+    except OSError:
+        status = 'error'
+    with lock:
+        statuses[status] += 1
+    in_flight.release()
+
+
+def writer(port, deadline, rate, max_in_flight, camper_ids, activity_ids, results):
+    statuses = Counter()
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    threads = []
+    interval = 1 / rate
+    next_send = time.monotonic()
+    while next_send < deadline:
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_send += interval
+        if not in_flight.acquire(blocking=False):
+            with lock:
+                statuses['not sent'] += 1
+            continue
+        thread = threading.Thread(
+            target=send_write,
+            args=(port, camper_ids, activity_ids, statuses, lock, in_flight))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    results.put(('write', statuses, 0))
+
+
+def run_phase(args, admission, writers, camper_ids, activity_ids):
+    port, servers = start_server(args.workers, admission)
+    time.sleep(0.5)
+
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + args.seconds
+    clients = [
+        multiprocessing.Process(target=reader, args=(port, deadline, results))
+        for _ in range(args.readers)
+    ] + [
+        multiprocessing.Process(
+            target=writer,
+            args=(port, deadline, args.write_rate, args.max_in_flight,
+                  camper_ids, activity_ids, results))
+        for _ in range(writers)
+    ]
+    for client in clients:
+        client.start()
+
+    latencies, statuses, read_errors = [], Counter(), 0
+    for _ in clients:
+        kind, data, errors = results.get()
+        if kind == 'read':
+            latencies.extend(data)
+            read_errors += errors
+        else:
+            statuses.update(data)
+
+    for client in clients:
+        client.join()
+    for server in servers:
+        server.terminate()
+        server.join()
+    return latencies, read_errors, statuses
+
+
+def report(name, latencies, read_errors, statuses):
+    p50 = percentile(latencies, 50) * 1000
+    p99 = percentile(latencies, 99) * 1000
+    writes = ', '.join(f'{code}: {count}' for code, count in sorted(
+        statuses.items(), key=lambda item: str(item[0])))
+    print(f'{name:<22} reads={len(latencies):<6} errors={read_errors:<3} '
+          f'p50={p50:7.2f}ms p99={p99:7.2f}ms  writes {{{writes}}}')
+    return p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--write-rate', type=float, default=25,
+                        help='Writes per second sent by each writer.')
+    parser.add_argument('--max-in-flight', type=int, default=16,
+                        help='Outstanding writes per writer before sends are skipped.')
+    parser.add_argument('--write-limit', type=int, default=1,
+                        help='Per-worker concurrency for each write route.')
+    parser.add_argument('--token-rate', type=float, default=5,
+                        help='Per-worker token bucket rate for the load client.')
+    parser.add_argument('--flat-ratio', type=float, default=1.5,
+                        help='Largest read p99 ratio to reads only that counts as flat.')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        campers = [Camper(name=fake.name(), age=randint(8, 18)) for _ in range(50)]
+        activities = [
+            Activity(name=fake.sentence(), difficulty=randint(1, 5)) for _ in range(10)
+        ]
+        db.session.add_all(campers + activities)
+        db.session.commit()
+        camper_ids = [camper.id for camper in campers]
+        activity_ids = [activity.id for activity in activities]
+        db.engine.dispose()
+
+    write_routes = ['create_camper', 'create_signup']
+    no_admission = {'ADMISSION_CONCURRENCY': {}, 'ADMISSION_RATE': 0}
+    admission = {
+        'ADMISSION_CONCURRENCY': {endpoint: args.write_limit for endpoint in write_routes},
+        'ADMISSION_QUEUE_SIZE': 2,
+        'ADMISSION_QUEUE_TARGET': 0.05,
+        'ADMISSION_RATE': args.token_rate,
+        'ADMISSION_BURST': 5,
+    }
+
+    baseline = report('reads only', *run_phase(
+        args, no_admission, 0, camper_ids, activity_ids))
+    unshed = report('writes, no admission', *run_phase(
+        args, no_admission, args.writers, camper_ids, activity_ids))
+    shed = report('writes, admission', *run_phase(
+        args, admission, args.writers, camper_ids, activity_ids))
+
+    print(f'read p99 vs reads only: no admission {unshed / baseline:.2f}x, '
+          f'admission {shed / baseline:.2f}x')
+    if shed / baseline <= args.flat_ratio:
+        print(f'PASS: read p99 stayed flat (within {args.flat_ratio}x) while writes were shed')
+    else:
+        print(f'FAIL: read p99 rose more than {args.flat_ratio}x with admission '
+              f'({os.cpu_count()} CPU(s), {args.workers} workers)')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ from sqlalchemy.orm import validates
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy_serializer import SerializerMixin
 
+from schemas import CAMPER_AGE, CAMPER_NAME, SIGNUP_TIME
+
 convention = {
     "ix": "ix_%(column_0_label)s",
     "uq": "uq_%(table_name)s_%(column_0_name)s",
@@ -61,15 +63,11 @@ class Camper(db.Model, SerializerMixin):
 
     @validates('name')
     def validate_name(self, key, name):
-        if not name:
-            raise ValueError("Camper must have a name")
-        return name
+        return CAMPER_NAME.clean(name)
 
     @validates('age')
     def validate_age(self, key, age):
-        if age is not None and (age < 8 or age > 18):
-            raise ValueError("Camper age must be between 8 and 18")
-        return age
+        return CAMPER_AGE.clean(age)
     
     
     def __repr__(self):
@@ -95,9 +93,7 @@ class Signup(db.Model, SerializerMixin):
 
     @validates('time')
     def validate_time(self, key, time):
-        if time is not None and (time < 0 or time > 23):
-            raise ValueError("Signup time must be between 0 and 23")
-        return time
+        return SIGNUP_TIME.clean(time)
     
     def __repr__(self):
         return f'<Signup {self.id}>'
\ No newline at end of file
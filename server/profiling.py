@@ -0,0 +1,178 @@
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StackSampler:
+    '''Samples the call stack of one thread on a background timer.'''
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f'{filename}:{code.co_name}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        '''Return the samples in collapsed-stack (flamegraph.pl) format.'''
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+
+class Profiler:
+    '''Opt-in per-request profiling with a ring buffer of captures.
+
+    A request is profiled when it carries an ``X-Profile`` header equal to
+    ``ADMIN_TOKEN`` or when it is picked by ``PROFILE_SAMPLE_RATE``. Other
+    requests only pay for the header lookup and one random draw.
+    '''
+
+    def __init__(self, app=None):
+        self.captures = deque()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ADMIN_TOKEN', None)
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_INTERVAL', 0.005)
+        app.config.setdefault('PROFILE_CAPACITY', 50)
+        self.captures = deque(maxlen=app.config['PROFILE_CAPACITY'])
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.after_request(self._after_request)
+
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def is_admin(self):
+        return token_matches(request.headers.get('X-Admin-Token'))
+
+    def _wants_profile(self):
+        if token_matches(request.headers.get('X-Profile')):
+            return True
+        rate = current_app.config['PROFILE_SAMPLE_RATE']
+        return rate > 0 and random.random() < rate
+
+    def _before_request(self):
+        if not self._wants_profile():
+            return
+        sampler = StackSampler(
+            threading.get_ident(), current_app.config['PROFILE_INTERVAL'])
+        g.profile = {
+            'sampler': sampler,
+            'sql': [],
+            'started': time.perf_counter(),
+        }
+        sampler.start()
+
+    def _after_request(self, response):
+        capture = g.get('profile')
+        if capture is not None:
+            capture['status'] = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        capture = g.pop('profile', None)
+        if capture is None:
+            return
+        capture['sampler'].stop()
+        elapsed = time.perf_counter() - capture['started']
+
+        with self._lock:
+            capture_id = next(self._ids)
+            self.captures.append({
+                'id': capture_id,
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'status': capture.get('status', 500),
+                'timestamp': time.time(),
+                'duration_ms': round(elapsed * 1000, 3),
+                'sql': capture['sql'],
+                'collapsed': capture['sampler'].collapsed(),
+            })
+
+    def list_captures(self):
+        with self._lock:
+            captures = list(self.captures)
+        return [serialize_capture(capture) for capture in captures]
+
+    def get_capture(self, capture_id):
+        with self._lock:
+            for capture in self.captures:
+                if capture['id'] == capture_id:
+                    return capture
+        return None
+
+
+def token_matches(header):
+    '''Compare a request header to ADMIN_TOKEN in constant time.'''
+    token = current_app.config['ADMIN_TOKEN']
+    if not token or header is None:
+        return False
+    return hmac.compare_digest(header.encode(), token.encode())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if has_app_context() and 'profile' in g:
+        conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    if not has_app_context() or 'profile' not in g:
+        return
+    starts = conn.info.get('profile_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    g.profile['sql'].append({
+        'statement': statement,
+        'duration_ms': round(elapsed * 1000, 3),
+    })
+
+
+def serialize_capture(capture):
+    return {
+        'id': capture['id'],
+        'method': capture['method'],
+        'path': capture['path'],
+        'status': capture['status'],
+        'timestamp': capture['timestamp'],
+        'duration_ms': capture['duration_ms'],
+        'sql_count': len(capture['sql']),
+    }
@@ -0,0 +1,185 @@
+_MISSING = object()
+
+MAX_ID = 2 ** 63 - 1
+MAX_INT_DIGITS = 19
+
+
+class Field:
+    '''One field rule, shared by the request schemas and the model validators.
+
+    Integer fields accept ints or digit strings of at most MAX_INT_DIGITS
+    digits and are coerced to int; booleans are rejected. List fields check
+    each element against the ``items`` field, if one is given.
+    '''
+
+    def __init__(self, kind, message, required=False, minimum=None,
+                 maximum=None, nonempty=False, items=None):
+        self.kind = kind
+        self.message = message
+        self.required = required
+        self.minimum = minimum
+        self.maximum = maximum
+        self.nonempty = nonempty
+        self.items = items
+        self.coerce = self._compile()
+
+    def _compile(self):
+        '''Build a closure that returns (value, error) for one value.'''
+        kind, message = self.kind, self.message
+        minimum, maximum, nonempty = self.minimum, self.maximum, self.nonempty
+        lo = float('-inf') if minimum is None else minimum
+        hi = float('inf') if maximum is None else maximum
+
+        if kind is int:
+            def coerce(value):
+                if value.__class__ is str:
+                    text = value.strip()
+                    digits = text[1:] if text[:1] == '-' else text
+                    if len(digits) > MAX_INT_DIGITS:
+                        return None, message
+                    if not (digits.isascii() and digits.isdigit()):
+                        return None, message
+                    value = int(text)
+                elif value.__class__ is not int:
+                    return None, message
+                if value < lo or value > hi:
+                    return None, message
+                return value, None
+        elif kind is str:
+            def coerce(value):
+                if value.__class__ is not str:
+                    return None, message
+                if nonempty and not value.strip():
+                    return None, message
+                return value, None
+        elif kind is list:
+            item_coerce = self.items.coerce if self.items is not None else None
+
+            def coerce(value):
+                if value.__class__ is not list:
+                    return None, message
+                if nonempty and not value:
+                    return None, message
+                if item_coerce is None:
+                    return value, None
+                coerced = []
+                for item in value:
+                    item, error = item_coerce(item)
+                    if error is not None:
+                        return None, message
+                    coerced.append(item)
+                return coerced, None
+        else:
+            raise TypeError(f'Unsupported field type: {kind!r}')
+
+        return coerce
+
+    def as_required(self):
+        return Field(self.kind, self.message, required=True, minimum=self.minimum,
+                     maximum=self.maximum, nonempty=self.nonempty, items=self.items)
+
+    def clean(self, value):
+        '''Return ``value`` coerced by this rule; raise ValueError if it is invalid.'''
+        if value is None:
+            if self.nonempty:
+                raise ValueError(self.message)
+            return None
+        value, error = self.coerce(value)
+        if error is not None:
+            raise ValueError(error)
+        return value
+
+
+class Schema:
+    '''A set of named fields compiled into a single validation function.'''
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self._validate = self._compile()
+
+    def _compile(self):
+        checks = tuple(
+            (name, field.coerce, field.required, field.message)
+            for name, field in self.fields.items()
+        )
+
+        def validate(payload):
+            if payload.__class__ is not dict:
+                return None, {'_schema': ['Expected a JSON object']}
+            data = {}
+            errors = {}
+            get = payload.get
+            for name, coerce, required, message in checks:
+                value = get(name, _MISSING)
+                if value is _MISSING or value is None:
+                    if required:
+                        errors[name] = [message]
+                    continue
+                value, error = coerce(value)
+                if error is None:
+                    data[name] = value
+                else:
+                    errors[name] = [error]
+            return data, errors
+
+        return validate
+
+    def validate(self, payload):
+        '''Return (data, errors) for one object; errors maps field to messages.'''
+        return self._validate(payload)
+
+    def validate_many(self, payloads):
+        '''Return (rows, errors) for a list; errors is a list of {index, errors}.'''
+        validate = self._validate
+        rows = []
+        errors = []
+        for index, payload in enumerate(payloads):
+            data, item_errors = validate(payload)
+            if item_errors:
+                errors.append({'index': index, 'errors': item_errors})
+            else:
+                rows.append(data)
+        return rows, errors
+
+
+CAMPER_NAME = Field(str, 'Camper must have a name', nonempty=True)
+CAMPER_AGE = Field(int, 'Camper age must be between 8 and 18', minimum=8, maximum=18)
+SIGNUP_TIME = Field(int, 'Signup time must be between 0 and 23', minimum=0, maximum=23)
+
+camper_create_schema = Schema(
+    name=CAMPER_NAME.as_required(),
+    age=CAMPER_AGE.as_required(),
+)
+
+camper_update_schema = Schema(
+    name=CAMPER_NAME,
+    age=CAMPER_AGE,
+)
+
+CAMPER_ID = Field(int, 'Camper id must be a positive integer',
+                  required=True, minimum=1, maximum=MAX_ID)
+ACTIVITY_ID = Field(int, 'Activity id must be a positive integer',
+                    required=True, minimum=1, maximum=MAX_ID)
+
+signup_create_schema = Schema(
+    camper_id=CAMPER_ID,
+    activity_id=ACTIVITY_ID,
+    time=SIGNUP_TIME.as_required(),
+)
+
+preference_schema = Schema(
+    camper_id=CAMPER_ID,
+    activities=Field(list, 'Activities must be a list of activity ids',
+                     required=True, items=ACTIVITY_ID),
+)
+
+assignment_schema = Schema(
+    preferences=Field(list, 'Preferences must be a non-empty list',
+                      required=True, nonempty=True),
+    hours=Field(list, 'Hours must be a list of times between 0 and 23',
+                nonempty=True, items=SIGNUP_TIME),
+    capacity=Field(int, 'Capacity must be a positive integer',
+                   minimum=1, maximum=MAX_ID),
+    max_per_camper=Field(int, 'Max per camper must be between 1 and 24',
+                         minimum=1, maximum=24),
+)
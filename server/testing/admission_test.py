@@ -0,0 +1,104 @@
+import threading
+
+from app import app, admission
+from admission import Gate, TokenBucket
+from faker import Faker
+
+
+class TestAdmission:
+    '''Admission control for write endpoints in admission.py'''
+
+    def setup_method(self):
+        self.config = {
+            key: app.config[key] for key in (
+                'ADMISSION_CONCURRENCY', 'ADMISSION_QUEUE_SIZE',
+                'ADMISSION_QUEUE_TARGET', 'ADMISSION_RATE', 'ADMISSION_BURST')
+        }
+        admission.reset()
+
+    def teardown_method(self):
+        app.config.update(self.config)
+        admission.reset()
+
+    def test_rate_limits_per_client(self):
+        '''returns 429 with Retry-After once a client runs out of tokens.'''
+
+        app.config['ADMISSION_RATE'] = 0.5
+        app.config['ADMISSION_BURST'] = 1
+
+        with app.app_context():
+            client = app.test_client()
+            camper = {'name': Faker().name(), 'age': '10'}
+
+            response = client.post('/campers', json=camper)
+            assert response.status_code == 201
+
+            response = client.post('/campers', json=camper)
+            assert response.status_code == 429
+            assert response.headers['Retry-After'] == '2'
+            assert response.json['error']
+
+            response = client.post(
+                '/campers', json=camper,
+                environ_base={'REMOTE_ADDR': '10.0.0.2'})
+            assert response.status_code == 201
+
+    def test_sheds_when_route_is_saturated(self):
+        '''returns 503 with Retry-After when no slot frees up within the queue target.'''
+
+        app.config['ADMISSION_CONCURRENCY'] = {'create_signup': 1}
+        app.config['ADMISSION_QUEUE_TARGET'] = 0.01
+
+        with app.app_context():
+            gate = admission._gate('create_signup', app.config)
+            assert gate.acquire(0)
+            try:
+                response = app.test_client().post('/signups', json={})
+                assert response.status_code == 503
+                assert response.headers['Retry-After'] == '1'
+
+                response = app.test_client().get('/activities')
+                assert response.status_code == 200
+            finally:
+                gate.release()
+
+    def test_releases_slot_after_request(self):
+        '''frees the route slot once the request finishes.'''
+
+        app.config['ADMISSION_CONCURRENCY'] = {'create_camper': 1}
+
+        with app.app_context():
+            for _ in range(3):
+                response = app.test_client().post(
+                    '/campers', json={'name': Faker().name(), 'age': '12'})
+                assert response.status_code == 201
+
+            assert admission.gates['create_camper'].active == 0
+
+    def test_gate_queues_until_release(self):
+        '''admits a queued request once a slot is released.'''
+
+        gate = Gate(limit=1, queue_size=1)
+        assert gate.acquire(0)
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(gate.acquire(5)))
+        waiter.start()
+        while gate.waiting == 0:
+            pass
+
+        assert not gate.acquire(5)
+
+        gate.release()
+        waiter.join()
+        assert results == [True]
+        assert gate.active == 1
+
+    def test_token_bucket_refills(self):
+        '''hands out burst tokens, then reports how long until the next one.'''
+
+        bucket = TokenBucket(rate=10, burst=2)
+        assert bucket.take() == 0
+        assert bucket.take() == 0
+        wait = bucket.take()
+        assert 0 < wait <= 0.1
@@ -0,0 +1,257 @@
+import threading
+
+import numpy as np
+
+from app import app, db
+from assignment import assign, minimum_ages
+from models import Activity, Camper, Signup
+from faker import Faker
+
+
+def run(ages, min_ages, preferences, capacity, **kwargs):
+    camper_busy = np.zeros((len(ages), 24), dtype=bool)
+    occupancy = np.zeros((len(min_ages), 24), dtype=int)
+    result, placed = assign(
+        np.array(ages), np.array(min_ages), np.array(preferences),
+        camper_busy, occupancy, capacity, **kwargs)
+    return [tuple(row) for row in np.column_stack(result).tolist()], placed, occupancy
+
+
+class TestAssignment:
+    '''Batch activity assignment in assignment.py'''
+
+    def test_minimum_ages(self):
+        '''reads minimum ages from the configured mapping, unrestricted otherwise.'''
+
+        assert minimum_ages([1, 5, None], {}).tolist() == [0, 0, 0]
+        assert minimum_ages([1, 5, None], {5: 16}).tolist() == [0, 16, 0]
+
+    def test_places_ranked_choices_in_free_hours(self):
+        '''gives each camper their choices at distinct hours.'''
+
+        signups, placed, occupancy = run(
+            [12, 12], [1, 1], [[0, 1], [1, 0]], capacity=5, hours=[9, 10])
+
+        assert sorted(signups) == [(0, 0, 9), (0, 1, 10), (1, 0, 10), (1, 1, 9)]
+        assert placed.all()
+        assert occupancy.sum() == 4
+
+    def test_respects_capacity_and_priority(self):
+        '''lets earlier campers win a full activity-hour and moves the rest.'''
+
+        signups, placed, occupancy = run(
+            [10, 10, 10], [1], [[0], [0], [0]], capacity=1, hours=[9, 10])
+
+        assert signups == [(0, 0, 9), (1, 0, 10)]
+        assert placed[:, 0].tolist() == [True, True, False]
+        assert occupancy.max() == 1
+
+    def test_respects_minimum_age(self):
+        '''skips activities whose minimum age the camper does not meet.'''
+
+        signups, placed, occupancy = run([8, 16], [16], [[0], [0]], capacity=5)
+
+        assert signups == [(1, 0, 0)]
+        assert placed[:, 0].tolist() == [False, True]
+
+    def test_limits_signups_per_camper(self):
+        '''stops once a camper reaches max_per_camper.'''
+
+        signups, placed, occupancy = run(
+            [12], [1, 1, 1], [[0, 1, 2]], capacity=5, max_per_camper=2)
+
+        assert [activity for _, activity, _ in signups] == [0, 1]
+
+    def test_skips_activities_already_signed_up_for(self):
+        '''counts existing (camper, activity) signups as placed without booking again.'''
+
+        already = np.array([[False, True], [False, False]])
+        signups, placed, occupancy = run(
+            [12, 12], [1, 1], [[0, 1], [1, 0]], capacity=5, hours=[9, 10],
+            already=already)
+
+        assert sorted(signups) == [(0, 0, 9), (1, 0, 10), (1, 1, 9)]
+        assert placed.all()
+
+    def test_existing_signups_only_count_against_explicit_cap(self):
+        '''leaves signups in the open hours out of the cap unless max_per_camper is set.'''
+
+        camper_busy = np.zeros((1, 24), dtype=bool)
+        camper_busy[0, 9] = True
+        for max_per_camper, placed_count in ((None, 2), (2, 1)):
+            result, placed = assign(
+                np.array([12]), np.array([1, 1]), np.array([[0, 1]]),
+                camper_busy.copy(), np.zeros((2, 24), dtype=int), 5,
+                hours=[9, 10, 11], max_per_camper=max_per_camper)
+            assert placed.sum() == placed_count
+
+    def test_assignments_endpoint(self):
+        '''writes signups with POST /assignments, skipping hours already taken.'''
+
+        with app.app_context():
+            fake = Faker()
+            campers = [Camper(name=fake.name(), age=12) for _ in range(3)]
+            activities = [Activity(name=fake.sentence(), difficulty=1) for _ in range(2)]
+            db.session.add_all(campers + activities)
+            db.session.commit()
+            db.session.add(Signup(
+                camper_id=campers[0].id, activity_id=activities[1].id, time=9))
+            db.session.commit()
+
+            response = app.test_client().post('/assignments', json={
+                'preferences': [
+                    {'camper_id': camper.id, 'activities': [a.id for a in activities]}
+                    for camper in campers
+                ],
+                'hours': [9, 10],
+                'capacity': 2,
+            })
+
+            assert response.status_code == 201
+            assert response.json['assigned'] == 5
+            assert response.json['unplaced'] == []
+            assert Signup.query.filter_by(
+                camper_id=campers[0].id, activity_id=activities[1].id).count() == 1
+
+            for camper in campers:
+                times = [s.time for s in Signup.query.filter_by(camper_id=camper.id)]
+                assert len(times) == len(set(times))
+            for activity in activities:
+                for time in (9, 10):
+                    assert Signup.query.filter_by(
+                        activity_id=activity.id, time=time).count() <= 2
+
+    def test_endpoint_ignores_unrelated_signups_for_cap(self):
+        '''places every choice when the camper already has an unrelated signup.'''
+
+        with app.app_context():
+            fake = Faker()
+            camper = Camper(name=fake.name(), age=12)
+            activities = [Activity(name=fake.sentence(), difficulty=1) for _ in range(3)]
+            db.session.add_all([camper] + activities)
+            db.session.commit()
+            db.session.add(Signup(
+                camper_id=camper.id, activity_id=activities[2].id, time=9))
+            db.session.commit()
+
+            response = app.test_client().post('/assignments', json={
+                'preferences': [{'camper_id': camper.id,
+                                 'activities': [activities[0].id, activities[1].id]}],
+                'hours': [9, 10, 11],
+            })
+
+            assert response.status_code == 201
+            assert response.json['unplaced'] == []
+            assert sorted(
+                (signup['activity_id'], signup['time'])
+                for signup in response.json['signups']
+            ) == [(activities[0].id, 10), (activities[1].id, 11)]
+
+    def test_repeated_run_adds_no_signups(self):
+        '''adds nothing when the same assignment is posted twice.'''
+
+        with app.app_context():
+            fake = Faker()
+            campers = [Camper(name=fake.name(), age=12) for _ in range(2)]
+            activities = [Activity(name=fake.sentence(), difficulty=1) for _ in range(2)]
+            db.session.add_all(campers + activities)
+            db.session.commit()
+            camper_ids = [camper.id for camper in campers]
+            payload = {
+                'preferences': [
+                    {'camper_id': camper_id, 'activities': [a.id for a in activities]}
+                    for camper_id in camper_ids
+                ],
+                'hours': [9, 10],
+            }
+            client = app.test_client()
+
+            response = client.post('/assignments', json=payload)
+            assert response.json['assigned'] == 4
+            response = client.post('/assignments', json=payload)
+            assert response.status_code == 201
+            assert response.json['assigned'] == 0
+            assert response.json['unplaced'] == []
+            assert Signup.query.filter(Signup.camper_id.in_(camper_ids)).count() == 4
+
+    def test_assignments_validation(self):
+        '''rejects bad payloads and unknown campers or activities.'''
+
+        with app.app_context():
+            client = app.test_client()
+
+            response = client.post('/assignments', json={'preferences': []})
+            assert response.status_code == 400
+            assert 'preferences' in response.json['field_errors']
+
+            response = client.post('/assignments', json={
+                'preferences': [{'camper_id': 1, 'activities': ['x']}], 'hours': [25]})
+            assert response.status_code == 400
+            assert 'hours' in response.json['field_errors']
+
+            response = client.post('/assignments', json={
+                'preferences': [{'camper_id': 2 ** 62, 'activities': [2 ** 62]}]})
+            assert response.status_code == 400
+            assert response.json['indexes'] == [0]
+
+    def test_endpoint_age_rule_is_configurable(self):
+        '''places any age by default and applies ASSIGNMENT_MIN_AGE_BY_DIFFICULTY when set.'''
+
+        with app.app_context():
+            fake = Faker()
+            campers = [Camper(name=fake.name(), age=9) for _ in range(2)]
+            activity = Activity(name=fake.sentence(), difficulty=5)
+            db.session.add_all(campers + [activity])
+            db.session.commit()
+
+            client = app.test_client()
+            response = client.post('/assignments', json={'preferences': [
+                {'camper_id': campers[0].id, 'activities': [activity.id]}]})
+            assert response.json['assigned'] == 1
+
+            app.config['ASSIGNMENT_MIN_AGE_BY_DIFFICULTY'] = {5: 16}
+            try:
+                response = client.post('/assignments', json={'preferences': [
+                    {'camper_id': campers[1].id, 'activities': [activity.id]}]})
+            finally:
+                app.config['ASSIGNMENT_MIN_AGE_BY_DIFFICULTY'] = {}
+            assert response.json['assigned'] == 0
+            assert response.json['unplaced'] == [
+                {'camper_id': campers[1].id, 'activity_id': activity.id}]
+
+    def test_concurrent_runs_do_not_overbook(self):
+        '''keeps capacity when runs overlap and admission control is off.'''
+
+        with app.app_context():
+            fake = Faker()
+            campers = [Camper(name=fake.name(), age=12) for _ in range(8)]
+            activity = Activity(name=fake.sentence(), difficulty=1)
+            db.session.add_all(campers + [activity])
+            db.session.commit()
+            camper_ids = [camper.id for camper in campers]
+            activity_id = activity.id
+
+        limits = app.config['ADMISSION_CONCURRENCY']
+        app.config['ADMISSION_CONCURRENCY'] = {}
+        statuses = []
+
+        def post(camper_id):
+            response = app.test_client().post('/assignments', json={
+                'preferences': [{'camper_id': camper_id, 'activities': [activity_id]}],
+                'hours': [9],
+                'capacity': 2,
+            })
+            statuses.append(response.status_code)
+
+        try:
+            threads = [threading.Thread(target=post, args=(c,)) for c in camper_ids]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            app.config['ADMISSION_CONCURRENCY'] = limits
+
+        assert statuses == [201] * len(camper_ids)
+        with app.app_context():
+            assert Signup.query.filter_by(activity_id=activity_id, time=9).count() == 2
@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+
+from sqlalchemy.exc import OperationalError
+
+import app as app_module
+from app import app, db
+from models import Activity, Camper, Signup
+from export import EXPORT_COLUMNS, export_signups_command
+from faker import Faker
+
+
+ADMIN = {'X-Admin-Token': 'secret'}
+
+
+class TestExport:
+    '''Bulk signup export in export.py'''
+
+    def setup_method(self):
+        app.config['ADMIN_TOKEN'] = 'secret'
+
+    def teardown_method(self):
+        app.config['ADMIN_TOKEN'] = None
+
+    def create_signups(self):
+        fake = Faker()
+        camper = Camper(name=fake.name(), age=12)
+        activity = Activity(name=fake.sentence(), difficulty=2)
+        db.session.add_all([camper, activity])
+        db.session.commit()
+
+        signups = [
+            Signup(camper_id=camper.id, activity_id=activity.id, time=time)
+            for time in (8, 9, 10)
+        ]
+        db.session.add_all(signups)
+        db.session.commit()
+        return camper, activity, signups
+
+    def test_exports_csv(self):
+        '''streams joined signups as CSV with GET /export/signups.'''
+
+        with app.app_context():
+            camper, activity, signups = self.create_signups()
+
+            response = app.test_client().get(
+                f'/export/signups?min_id={signups[0].id}&max_id={signups[-1].id}',
+                headers=ADMIN)
+            assert response.status_code == 200
+            assert response.content_type.startswith('text/csv')
+
+            rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+            assert tuple(rows[0]) == EXPORT_COLUMNS
+            assert rows[1:] == [
+                [str(signup.id), str(signup.time),
+                 str(camper.id), camper.name, str(camper.age),
+                 str(activity.id), activity.name, str(activity.difficulty)]
+                for signup in signups
+            ]
+
+    def test_exports_ndjson(self):
+        '''streams joined signups as NDJSON and honors the id range.'''
+
+        with app.app_context():
+            camper, activity, signups = self.create_signups()
+
+            response = app.test_client().get(
+                f'/export/signups?format=ndjson&min_id={signups[1].id}'
+                f'&max_id={signups[1].id}', headers=ADMIN)
+            assert response.status_code == 200
+
+            rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            assert rows == [{
+                'signup_id': signups[1].id, 'time': 9,
+                'camper_id': camper.id, 'camper_name': camper.name, 'camper_age': 12,
+                'activity_id': activity.id, 'activity_name': activity.name,
+                'activity_difficulty': 2,
+            }]
+
+    def test_rejects_bad_parameters(self):
+        '''returns 400 for an unknown format or a non-integer range.'''
+
+        with app.app_context():
+            client = app.test_client()
+            assert client.get('/export/signups').status_code == 403
+            assert client.get(
+                '/export/signups?format=xml', headers=ADMIN).status_code == 400
+
+            response = client.get('/export/signups?min_id=abc', headers=ADMIN)
+            assert response.status_code == 400
+            assert 'min_id' in response.json['field_errors']
+
+            response = client.get(
+                '/export/signups?min_id=999999999999999999999999999999', headers=ADMIN)
+            assert response.status_code == 400
+            assert 'min_id' in response.json['field_errors']
+
+            response = client.get(f'/export/signups?max_id={2 ** 63}', headers=ADMIN)
+            assert response.status_code == 400
+
+    def test_empty_range(self):
+        '''returns only the CSV header when no signups match.'''
+
+        with app.app_context():
+            response = app.test_client().get(
+                f'/export/signups?min_id={2 ** 63 - 1}', headers=ADMIN)
+            assert response.status_code == 200
+            assert response.get_data(as_text=True).strip() == ','.join(EXPORT_COLUMNS)
+
+    def test_query_errors_before_streaming(self, monkeypatch):
+        '''returns 500 instead of a truncated 200 when the export query fails.'''
+
+        def failing_rows(*args):
+            raise OperationalError('SELECT', {}, Exception('database is locked'))
+            yield
+
+        monkeypatch.setattr(app_module, 'signup_export_rows', failing_rows)
+        with app.app_context():
+            response = app.test_client().get('/export/signups', headers=ADMIN)
+            assert response.status_code == 500
+            assert response.json['error']
+
+    def test_cli_command(self, tmp_path):
+        '''writes the export to a file with flask export-signups.'''
+
+        with app.app_context():
+            camper, activity, signups = self.create_signups()
+            signup_ids = [signup.id for signup in signups]
+
+        output = tmp_path / 'signups.ndjson'
+        result = app.test_cli_runner().invoke(export_signups_command, [
+            '--format', 'ndjson', '--min-id', str(signup_ids[0]),
+            '--output', str(output),
+        ])
+        assert result.exit_code == 0
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [row['signup_id'] for row in rows] == signup_ids
+
+        for option, value in (('--min-id', str(2 ** 63)), ('--max-id', '-1')):
+            result = app.test_cli_runner().invoke(
+                export_signups_command, [option, value])
+            assert result.exit_code == 2
+            assert 'Invalid value' in result.output
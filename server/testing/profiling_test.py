@@ -0,0 +1,112 @@
+import threading
+import time
+
+from app import app, db, profiler
+from models import Camper
+from profiling import StackSampler
+from faker import Faker
+
+
+class TestProfiling:
+    '''On-demand request profiling in profiling.py'''
+
+    def setup_method(self):
+        app.config['ADMIN_TOKEN'] = 'secret'
+        profiler.captures.clear()
+
+    def teardown_method(self):
+        app.config['ADMIN_TOKEN'] = None
+        app.config['PROFILE_SAMPLE_RATE'] = 0.0
+        profiler.captures.clear()
+
+    def test_skips_requests_without_opt_in(self):
+        '''does not capture requests that do not opt in.'''
+
+        with app.app_context():
+            app.test_client().get('/campers')
+            app.test_client().get('/campers', headers={'X-Profile': 'wrong'})
+
+        assert len(profiler.captures) == 0
+
+    def test_captures_opted_in_request(self):
+        '''captures timing and SQL statements for a request with the X-Profile header.'''
+
+        with app.app_context():
+            camper = Camper(name=Faker().name(), age=10)
+            db.session.add(camper)
+            db.session.commit()
+
+            response = app.test_client().get(
+                f'/campers/{camper.id}', headers={'X-Profile': 'secret'})
+            assert response.status_code == 200
+
+        assert len(profiler.captures) == 1
+        capture = profiler.captures[0]
+        assert capture['path'] == f'/campers/{camper.id}'
+        assert capture['status'] == 200
+        assert capture['sql']
+        assert any('FROM signups' in q['statement'] for q in capture['sql'])
+
+    def test_samples_by_rate(self):
+        '''captures requests picked by PROFILE_SAMPLE_RATE.'''
+
+        app.config['PROFILE_SAMPLE_RATE'] = 1.0
+        with app.app_context():
+            app.test_client().get('/activities')
+
+        assert len(profiler.captures) == 1
+
+    def test_ring_buffer_is_bounded(self):
+        '''keeps only the most recent PROFILE_CAPACITY captures.'''
+
+        with app.app_context():
+            for _ in range(profiler.captures.maxlen + 5):
+                app.test_client().get('/', headers={'X-Profile': 'secret'})
+
+        assert len(profiler.captures) == profiler.captures.maxlen
+
+    def test_admin_endpoints(self):
+        '''lists and downloads captures only for admin requests.'''
+
+        with app.app_context():
+            client = app.test_client()
+            client.get('/activities', headers={'X-Profile': 'secret'})
+
+            assert client.get('/admin/profiles').status_code == 403
+
+            admin = {'X-Admin-Token': 'secret'}
+            profiles = client.get('/admin/profiles', headers=admin).json['profiles']
+            assert len(profiles) == 1
+            capture_id = profiles[0]['id']
+
+            response = client.get(f'/admin/profiles/{capture_id}', headers=admin)
+            assert response.status_code == 200
+            assert response.json['profile']['path'] == '/activities'
+            assert response.json['profile']['sql']
+
+            response = client.get(
+                f'/admin/profiles/{capture_id}?format=collapsed', headers=admin)
+            assert response.status_code == 200
+            assert response.content_type.startswith('text/plain')
+
+            response = client.get('/admin/profiles/0', headers=admin)
+            assert response.status_code == 404
+
+    def test_stack_sampler_collapses_stacks(self):
+        '''produces collapsed stacks for the sampled thread.'''
+
+        def busy_wait():
+            end = time.perf_counter() + 0.05
+            while time.perf_counter() < end:
+                pass
+
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        busy_wait()
+        sampler.stop()
+
+        collapsed = sampler.collapsed()
+        assert 'profiling_test.py:busy_wait' in collapsed
+        for line in collapsed.splitlines():
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
@@ -0,0 +1,152 @@
+import pytest
+
+from app import app, db
+from models import Activity, Camper, Signup
+from schemas import (CAMPER_AGE, camper_create_schema, camper_update_schema,
+                     signup_create_schema)
+from faker import Faker
+
+
+class TestSchemas:
+    '''Request schemas in schemas.py'''
+
+    def test_coerces_valid_payload(self):
+        '''returns coerced data and no errors for a valid payload.'''
+
+        data, errors = camper_create_schema.validate({'name': 'Ada', 'age': '12'})
+        assert errors == {}
+        assert data == {'name': 'Ada', 'age': 12}
+
+    def test_reports_all_field_errors(self):
+        '''reports every invalid or missing field at once.'''
+
+        data, errors = camper_create_schema.validate({'name': '', 'age': 19})
+        assert set(errors) == {'name', 'age'}
+
+        data, errors = signup_create_schema.validate({'time': 'noon'})
+        assert set(errors) == {'camper_id', 'activity_id', 'time'}
+
+    def test_rejects_wrong_types(self):
+        '''rejects booleans, floats, non-digit strings and non-object payloads.'''
+
+        for age in (True, 10.5, '1o', '²', [], {}):
+            data, errors = camper_create_schema.validate({'name': 'Ada', 'age': age})
+            assert 'age' in errors
+
+        data, errors = camper_create_schema.validate(['Ada', 12])
+        assert errors == {'_schema': ['Expected a JSON object']}
+
+    def test_update_fields_are_optional(self):
+        '''allows partial updates but validates fields that are present.'''
+
+        assert camper_update_schema.validate({}) == ({}, {})
+        assert camper_update_schema.validate({'age': 9}) == ({'age': 9}, {})
+        data, errors = camper_update_schema.validate({'name': ''})
+        assert 'name' in errors
+
+    def test_validate_many_indexes_errors(self):
+        '''returns valid rows and per-index errors for arrays.'''
+
+        rows, errors = camper_create_schema.validate_many([
+            {'name': 'Ada', 'age': 9},
+            {'name': 'Bob', 'age': 30},
+            {'name': 'Cy', 'age': 10},
+        ])
+        assert rows == [{'name': 'Ada', 'age': 9}, {'name': 'Cy', 'age': 10}]
+        assert errors == [{'index': 1, 'errors': {'age': [CAMPER_AGE.message]}}]
+
+    def test_models_share_field_rules(self):
+        '''raises the schema message from the model validators.'''
+
+        with pytest.raises(ValueError, match=CAMPER_AGE.message):
+            Camper(name=Faker().name(), age=19)
+
+        camper = Camper(name=Faker().name(), age='12')
+        assert camper.age == 12
+
+        with pytest.raises(ValueError):
+            Signup(camper_id=1, activity_id=1, time='noon')
+
+    def test_rejects_oversized_integers(self):
+        '''returns 400 for huge digit strings and out-of-range ids.'''
+
+        with app.app_context():
+            client = app.test_client()
+
+            response = client.post('/campers', json={'name': 'A', 'age': '1' * 5000})
+            assert response.status_code == 400
+            assert 'age' in response.json['field_errors']
+
+            response = client.post('/signups', json={
+                'camper_id': 2 ** 70, 'activity_id': str(2 ** 63), 'time': 9})
+            assert response.status_code == 400
+            assert set(response.json['field_errors']) == {'camper_id', 'activity_id'}
+
+            response = client.post('/signups', json={
+                'camper_id': 0, 'activity_id': -1, 'time': 9})
+            assert response.status_code == 400
+
+    def test_bulk_create_campers(self):
+        '''creates an array of campers with one POST to /campers.'''
+
+        with app.app_context():
+            names = [Faker().name() for _ in range(3)]
+            response = app.test_client().post(
+                '/campers', json=[{'name': name, 'age': 10} for name in names])
+
+            assert response.status_code == 201
+            assert [camper['name'] for camper in response.json] == names
+            assert Camper.query.filter(Camper.name.in_(names)).count() == 3
+
+    def test_bulk_rejects_whole_array(self):
+        '''creates nothing when any item in an array is invalid.'''
+
+        with app.app_context():
+            name = Faker().name()
+            response = app.test_client().post(
+                '/campers', json=[{'name': name, 'age': 10}, {'name': '', 'age': 10}])
+
+            assert response.status_code == 400
+            assert response.json['field_errors'][0]['index'] == 1
+            assert not Camper.query.filter(Camper.name == name).count()
+
+    def test_bulk_create_signups(self):
+        '''creates an array of signups and reports missing campers or activities.'''
+
+        with app.app_context():
+            fake = Faker()
+            camper = Camper(name=fake.name(), age=11)
+            activity = Activity(name=fake.sentence(), difficulty=3)
+            db.session.add_all([camper, activity])
+            db.session.commit()
+
+            response = app.test_client().post('/signups', json=[
+                {'camper_id': camper.id, 'activity_id': activity.id, 'time': 9},
+                {'camper_id': camper.id, 'activity_id': activity.id, 'time': 10},
+            ])
+            assert response.status_code == 201
+            assert [signup['time'] for signup in response.json] == [9, 10]
+            assert Signup.query.filter_by(camper_id=camper.id).count() == 2
+
+            response = app.test_client().post('/signups', json=[
+                {'camper_id': camper.id, 'activity_id': activity.id, 'time': 11},
+                {'camper_id': 2 ** 62, 'activity_id': activity.id, 'time': 11},
+            ])
+            assert response.status_code == 400
+            assert response.json['indexes'] == [1]
+
+    def test_bulk_rejects_empty_array(self, monkeypatch):
+        '''returns 400 for an empty array without touching the session.'''
+
+        with app.app_context():
+            def fail(*args, **kwargs):
+                raise AssertionError('session used for an empty array')
+            monkeypatch.setattr(db.session, 'add_all', fail)
+            monkeypatch.setattr(db.session, 'commit', fail)
+            client = app.test_client()
+
+            for path in ('/campers', '/signups'):
+                response = client.post(path, json=[])
+                assert response.status_code == 400
+                assert response.json['field_errors'] == {
+                    '_schema': ['Expected a non-empty array']}